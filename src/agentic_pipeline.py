@@ -11,10 +11,12 @@ Stages:
 4. Generate a runnable `GeneratedNPDChecker.cpp` source file
 """
 
-import os, json, sys, re
+import os, io, json, sys, re, time, asyncio, argparse, contextlib, functools
 from pathlib import Path
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError
+from llm_cache import LLMCache
 
 # ---------------------------------------------------------------------
 # Setup
@@ -28,83 +30,259 @@ load_dotenv(BASE_DIR / ".env")
 API_KEY   = os.getenv("API_KEY")
 BASE_URL  = os.getenv("BASE_URL", "https://api.openai.com/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "20"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_RPM", "500"))
+BATCH_POLL_SECONDS = 30
+USE_CACHE = os.getenv("LLM_CACHE", "1") != "0"
+CACHE_FILE = BASE_DIR / ".llm_cache.sqlite"
+MAX_DIFF_TOKENS = int(os.getenv("MAX_DIFF_TOKENS", "2000"))
+CHARS_PER_TOKEN = 4   # rough estimate for code/English; avoids a tokenizer dependency
 
 if not API_KEY:
     sys.exit("❌ Missing API_KEY in .env")
 
-client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
+# One pooled, keep-alive HTTP client per flavour, sized for MAX_CONCURRENCY
+# in-flight requests so concurrent calls reuse warm TLS connections.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=max(64, MAX_CONCURRENCY),
+    max_keepalive_connections=max(32, MAX_CONCURRENCY),
+    keepalive_expiry=60,
+)
+# The SDK retries connection errors, 408/409/429 and 5xx with jittered
+# exponential backoff and honours Retry-After; we only raise the attempt cap.
+RETRIED_STATUS = (408, 409, 429)
+
+def was_retried(exc: BaseException) -> bool:
+    """True if the SDK would have retried `exc` (connection error, 408/409/429, 5xx)."""
+    if isinstance(exc, APIConnectionError):
+        return True
+    return isinstance(exc, APIStatusError) and (
+        exc.status_code in RETRIED_STATUS or exc.status_code >= 500)
+client  = OpenAI(api_key=API_KEY, base_url=BASE_URL, max_retries=MAX_RETRIES,
+                 http_client=httpx.Client(limits=HTTP_LIMITS, timeout=60.0))
+aclient = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL, max_retries=MAX_RETRIES,
+                      http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=60.0))
+cache   = LLMCache(CACHE_FILE) if USE_CACHE else None
 
 # ---------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------
-def ask_llm(prompt: str, temperature: float = 0.15) -> str:
-    """Single call wrapper for the OpenAI model."""
-    resp = client.chat.completions.create(
-        model=LLM_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-    )
-    result = resp.choices[0].message.content.strip()
-    result = re.sub(r"^```[\w-]*|```$", "", result, flags=re.MULTILINE).strip()
+class RateLimiter:
+    """Spaces request starts at least 60/rpm seconds apart within one event loop."""
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+limiter = RateLimiter(REQUESTS_PER_MINUTE)
+
+def chat_messages(prompt: str, system: str = "") -> list:
+    """Static instructions go in the system message so providers can cache the shared prefix."""
+    messages = [{"role": "system", "content": system}] if system else []
+    return messages + [{"role": "user", "content": prompt}]
+
+async def ask_llm_async(prompt: str, sem: asyncio.Semaphore | None = None,
+                        temperature: float = 0.15, system: str = "") -> str:
+    """Single call wrapper for the OpenAI model; `sem` bounds the number of in-flight requests."""
+    if cache and (hit := cache.get(LLM_MODEL, prompt, temperature, system)) is not None:
+        return hit
+    async with sem or contextlib.nullcontext():
+        await limiter.wait()
+        resp = await aclient.chat.completions.create(
+            model=LLM_MODEL,
+            messages=chat_messages(prompt, system),
+            temperature=temperature,
+        )
+    result = strip_fences(resp.choices[0].message.content)
+    if cache:
+        cache.put(LLM_MODEL, prompt, temperature, result, system)
     return result
 
-def read_prompt(name: str) -> str:
+def strip_fences(text: str) -> str:
+    """Remove markdown code fences the model may wrap its answer in."""
+    return re.sub(r"^```[\w-]*|```$", "", text.strip(), flags=re.MULTILINE).strip()
+
+def close():
+    """Shut down the sync connection pool and the response cache."""
+    client.close()
+    if cache:
+        cache.close()
+
+async def aclose():
+    """Shut down the async connection pool (must run inside its event loop)."""
+    await aclient.close()
+
+@functools.cache
+def read_prompt(name: str) -> tuple[str, str]:
+    """Return (system, user_template) for a prompt file.
+
+    Everything above the `{{USER_PROMPT}}` marker line is static and sent as the
+    system message; the rest holds the per-call placeholders.
+    """
     path = PROMPT_DIR / f"{name}.txt"
     if not path.exists():
         sys.exit(f"❌ Missing prompt: {path}")
-    return path.read_text(encoding="utf-8")
+    text = path.read_text(encoding="utf-8")
+    system, sep, user = text.partition("{{USER_PROMPT}}\n")
+    return (system.strip(), user) if sep else ("", text)
 
 def log(msg: str):
     print(f"[agentic] {msg}")
 
+_HUNK_START_RE = re.compile(r"^(?=diff --git |@@ )", re.MULTILINE)
+
+def trim_diff(diff: str, max_tokens: int = MAX_DIFF_TOKENS) -> str:
+    """Bound a diff to roughly `max_tokens` tokens, dropping whole trailing hunks."""
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(diff) <= budget:
+        return diff
+    kept, used = [], 0
+    for chunk in _HUNK_START_RE.split(diff):
+        if used + len(chunk) > budget:
+            break
+        kept.append(chunk)
+        used += len(chunk)
+    trimmed = "".join(kept) if kept else diff[:budget]
+    return trimmed.rstrip("\n") + "\n[... diff truncated ...]"
+
+def extraction_prompt(tmpl: str, commit: dict) -> str:
+    """Fill the pattern-extraction template with one commit's message and (trimmed) diff."""
+    return tmpl.replace("{{DIFF_AND_MESSAGE}}",
+                        commit.get("message", "") + "\n\n" + trim_diff(commit.get("diff", "")))
+
 # ---------------------------------------------------------------------
 # Pipeline stages
 # ---------------------------------------------------------------------
-def extract_patterns(curated_json):
-    tmpl = read_prompt("pattern_extraction")
-    patterns = []
-    for p in curated_json.get("Null-Pointer Dereference (NPD)", []):
-        diff = p.get("diff", "")
-        msg  = p.get("message", "")
-        prompt = tmpl.replace("{{DIFF_AND_MESSAGE}}", msg + "\n\n" + diff)
+async def extract_patterns(curated_json):
+    """Extract one pattern per curated commit; requests run concurrently."""
+    system, tmpl = read_prompt("pattern_extraction")
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    commits = curated_json.get("Null-Pointer Dereference (NPD)", [])
+    coros = []
+    for p in commits:
         log(f"→ Extracting pattern from commit {p['commit'][:8]}")
-        patterns.append(ask_llm(prompt))
+        coros.append(ask_llm_async(extraction_prompt(tmpl, p), sem, system=system))
+    results = await asyncio.gather(*coros, return_exceptions=True)
+
+    patterns = []
+    for p, res in zip(commits, results):
+        if isinstance(res, BaseException):
+            # 400/401/context-length errors fail on the first attempt
+            retried = f" after {MAX_RETRIES} retries" if was_retried(res) else ""
+            log(f"⚠️ Pattern extraction failed for commit {p['commit'][:8]}{retried}: "
+                f"{type(res).__name__}: {res}")
+            continue
+        patterns.append(res)
     return patterns
 
-def merge_patterns(patterns):
-    tmpl = read_prompt("pattern_merge")
+def extract_patterns_batch(curated_json, temperature: float = 0.15):
+    """Same as extract_patterns, but submitted as one OpenAI Batch API job.
+
+    Batch jobs are billed at a discount and draw from a separate rate-limit
+    pool, at the cost of latency (up to the 24h completion window).
+    """
+    system, tmpl = read_prompt("pattern_extraction")
+    commits = curated_json.get("Null-Pointer Dereference (NPD)", [])
+    prompts = {p["commit"]: extraction_prompt(tmpl, p) for p in commits}
+    results = {}
+    if cache:
+        for sha, prompt in prompts.items():
+            if (hit := cache.get(LLM_MODEL, prompt, temperature, system)) is not None:
+                results[sha] = hit
+    pending = [sha for sha in prompts if sha not in results]
+    if not pending:
+        return [results[p["commit"]] for p in commits]
+
+    buf = io.BytesIO()
+    for sha in pending:
+        line = {
+            "custom_id": sha,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": LLM_MODEL,
+                "messages": chat_messages(prompts[sha], system),
+                "temperature": temperature,
+            },
+        }
+        buf.write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    batch_input = client.files.create(file=("pattern_extraction.jsonl", buf.getvalue()),
+                                      purpose="batch")
+    batch = client.batches.create(input_file_id=batch_input.id,
+                                  endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+    log(f"→ Submitted batch {batch.id} with {len(pending)} extraction requests")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+        log(f"   batch {batch.id}: {batch.status}")
+    if batch.status != "completed" or not batch.output_file_id:
+        sys.exit(f"❌ Batch {batch.id} ended with status '{batch.status}'")
+
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        rec = json.loads(line)
+        body = (rec.get("response") or {}).get("body") or {}
+        if not body.get("choices"):
+            log(f"⚠️ No result for commit {rec['custom_id'][:8]}: {rec.get('error')}")
+            continue
+        sha = rec["custom_id"]
+        results[sha] = strip_fences(body["choices"][0]["message"]["content"])
+        if cache:
+            cache.put(LLM_MODEL, prompts[sha], temperature, results[sha], system)
+    return [results[p["commit"]] for p in commits if p["commit"] in results]
+
+async def merge_patterns(patterns):
+    system, tmpl = read_prompt("pattern_merge")
     joined = "\n".join(f"- {p}" for p in patterns)
     prompt = tmpl.replace("{{BUG_PATTERNS}}", joined)
     log("→ Merging extracted patterns")
-    return ask_llm(prompt)
+    return await ask_llm_async(prompt, system=system)
 
-def synthesize_plan(merged_pattern):
-    tmpl = read_prompt("plan_synthesis")
+async def synthesize_plan(merged_pattern):
+    system, tmpl = read_prompt("plan_synthesis")
     prompt = tmpl.replace("{{BUG_PATTERN}}", merged_pattern)
     log("→ Synthesizing checker plan")
-    return ask_llm(prompt)
-
-def sanitize_cpp_for_llvm20(code: str) -> str:
-    """Quick patch for legacy LLVM API calls in generated code."""
-    fixes = {
-        ".equals(": " == ",
-        ".equals_insensitive(": " == ",   # fallback
-        ".startswith(": ".starts_with(",
-        ".endswith(": ".ends_with("
-    }
-    for old, new in fixes.items():
-        code = code.replace(old, new)
-
+    return await ask_llm_async(prompt, system=system)
+
+# Legacy LLVM API spellings → LLVM 20 replacements, applied in one regex pass.
+_SANITIZE_FIXES = {
+    ".equals(": " == ",
+    ".equals_insensitive(": " == ",   # fallback
+    ".startswith(": ".starts_with(",
+    ".endswith(": ".ends_with(",
     # Replace Optional<> with std::optional<>
-    code = re.sub(r"\bOptional<", "std::optional<", code)
-
+    "Optional<": "std::optional<",
     # Fix legacy Checker<> callback syntax if model reverts to older API
-    code = re.sub(r"\bcheckPostCall\b", "check::PostCall", code)
-    code = re.sub(r"\bcheckPreStmt\b", "check::PreStmt<Expr>", code)
-    code = re.sub(r"\bcheckDeadSymbols\b", "check::DeadSymbols", code)
-
+    "checkPostCall": "check::PostCall",
+    "checkPreStmt": "check::PreStmt<Expr>",
+    "checkDeadSymbols": "check::DeadSymbols",
+}
+_SANITIZE_RE = re.compile(
+    r"\.equals_insensitive\(|\.equals\(|\.startswith\(|\.endswith\("
+    r"|\bOptional<|\bcheckPostCall\b|\bcheckPreStmt\b|\bcheckDeadSymbols\b"
     # Fix incorrect emitReport() calls (raw pointer → std::move)
-    code = re.sub(r"C\.emitReport\((\w+)\);", r"C.emitReport(std::move(\1));", code)
+    r"|C\.emitReport\((\w+)\);"
+)
+
+def _sanitize_repl(m: re.Match) -> str:
+    if m.group(1) is not None:
+        return f"C.emitReport(std::move({m.group(1)}));"
+    return _SANITIZE_FIXES[m.group(0)]
+
+def sanitize_cpp_for_llvm20(code: str) -> str:
+    """Quick patch for legacy LLVM API calls in generated code."""
+    code = _SANITIZE_RE.sub(_sanitize_repl, code)
 
     # If missing, inject required CallEvent include
     if 'CallEvent.h' not in code:
@@ -112,8 +290,8 @@ def sanitize_cpp_for_llvm20(code: str) -> str:
 
     return code
 
-def generate_checker(merged_pattern, plan_text):
-    tmpl = read_prompt("checker_generation")
+async def generate_checker(merged_pattern, plan_text):
+    system, tmpl = read_prompt("checker_generation")
     llvm_env_info = """
     # ENVIRONMENT CONTEXT
     - LLVM/Clang Version: 20.1.8
@@ -128,12 +306,14 @@ def generate_checker(merged_pattern, plan_text):
       clang++ -fPIC -shared -fno-rtti -std=c++17 -I/usr/include GeneratedNPDChecker.cpp -o libNPDChecker.so
     """
 
+    # Environment info is static, so it belongs with the system prompt ahead
+    # of the per-run pattern and plan.
+    system = system + "\n\n" + llvm_env_info
     prompt = (tmpl.replace("{{BUG_PATTERN}}", merged_pattern)
-                   .replace("{{PLAN_TEXT}}", plan_text)
-                   + "\n\n" + llvm_env_info)
+                  .replace("{{PLAN_TEXT}}", plan_text))
 
     log("→ Requesting C++ CSA checker code generation")
-    cpp_code = ask_llm(prompt)
+    cpp_code = await ask_llm_async(prompt, system=system)
     cpp_code = re.sub(r"^```[\w-]*|```$", "", cpp_code, flags=re.MULTILINE).strip()
 
     cpp_code = sanitize_cpp_for_llvm20(cpp_code)
@@ -142,35 +322,72 @@ def generate_checker(merged_pattern, plan_text):
         log("⚠️ Possible invalid checker; please inspect manually.")
 
     out_file = Path("GeneratedNPDChecker.cpp")
-    out_file.write_text(cpp_code, encoding="utf-8")
+    await asyncio.to_thread(out_file.write_text, cpp_code, encoding="utf-8")
     log(f"✅ Generated and saved → {out_file}")
     return cpp_code
 
+async def write_output(path: str, text: str, msg: str):
+    """Write a stage artifact off the event loop so it overlaps the next LLM call."""
+    await asyncio.to_thread(Path(path).write_text, text)
+    log(msg)
+
 # ---------------------------------------------------------------------
 # Main entry
 # ---------------------------------------------------------------------
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize a CSA checker from curated NPD commits.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--realtime", dest="batch", action="store_false",
+                      help="Extract patterns with concurrent chat completions (default).")
+    mode.add_argument("--batch", dest="batch", action="store_true",
+                      help="Extract patterns through the OpenAI Batch API (cheaper, slower).")
+    parser.set_defaults(batch=False)
+    return parser.parse_args(argv)
+
+async def run_pipeline(args, curated):
+    """Run stages 1–4; stage outputs are persisted while the next stage is in flight."""
+    writes = []
+    try:
+        # Stage 1 -------------------------------------------------------
+        if args.batch:
+            # Called on the loop thread: the SQLite cache is bound to the thread
+            # that opened it, and nothing else is in flight during stage 1.
+            patterns = extract_patterns_batch(curated)
+        else:
+            patterns = await extract_patterns(curated)
+        if not patterns:
+            sys.exit("❌ Pattern extraction failed for every commit; nothing to merge")
+        writes.append(asyncio.create_task(write_output(
+            "pattern_outputs.txt", "\n\n".join(patterns),
+            "🧩 Stored raw patterns → pattern_outputs.txt")))
+
+        # Stage 2 -------------------------------------------------------
+        merged = await merge_patterns(patterns)
+        writes.append(asyncio.create_task(write_output(
+            "merged_pattern.txt", merged,
+            "🔗 Stored merged pattern → merged_pattern.txt")))
+
+        # Stage 3 -------------------------------------------------------
+        plan = await synthesize_plan(merged)
+        writes.append(asyncio.create_task(write_output(
+            "checker_plan.txt", plan,
+            "🧠 Stored checker plan → checker_plan.txt")))
+
+        # Stage 4 -------------------------------------------------------
+        code = await generate_checker(merged, plan)
+        log("🎯 C++ checker code ready.")
+
+        await asyncio.gather(*writes)
+        return patterns, merged, plan, code
+    finally:
+        await aclose()
+
+def main(argv=None):
+    args = parse_args(argv)
     log("Loading curated JSON dataset …")
     curated = json.loads(Path(CURATED_FILE).read_text(encoding="utf-8"))
 
-    # Stage 1 -----------------------------------------------------------
-    patterns = extract_patterns(curated)
-    Path("pattern_outputs.txt").write_text("\n\n".join(patterns))
-    log("🧩 Stored raw patterns → pattern_outputs.txt")
-
-    # Stage 2 -----------------------------------------------------------
-    merged = merge_patterns(patterns)
-    Path("merged_pattern.txt").write_text(merged)
-    log("🔗 Stored merged pattern → merged_pattern.txt")
-
-    # Stage 3 -----------------------------------------------------------
-    plan = synthesize_plan(merged)
-    Path("checker_plan.txt").write_text(plan)
-    log("🧠 Stored checker plan → checker_plan.txt")
-
-    # Stage 4 -----------------------------------------------------------
-    code = generate_checker(merged, plan)
-    log("🎯 C++ checker code ready.")
+    patterns, merged, plan, code = asyncio.run(run_pipeline(args, curated))
 
     # Summary -----------------------------------------------------------
     print("\n=== PIPELINE SUMMARY ===")
@@ -185,4 +402,6 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        log("Interrupted by user.")
\ No newline at end of file
+        log("Interrupted by user.")
+    finally:
+        close()
\ No newline at end of file
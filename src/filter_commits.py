@@ -4,14 +4,16 @@ src/filter_commits.py (multi‑category version)
 ----------------------------------------------
 
 Each commit may belong to several categories if its diff/message
-matches multiple keyword sets.
+matches multiple keyword sets. Commits are stored once under "commits";
+"by_category" maps each category to indices into that list.
 
 Output:
     mined_patches_raw/v5.10_to_v5.17_categorized.json
 """
 
-import os, json, re
-from git import Repo
+import os, sys, json, re, subprocess
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 # ---------------------------------------------------------------------------
@@ -34,13 +36,15 @@ TRIVIAL_WORDS = (
     "comment", "documentation", "doc", "docs", "whitespace",
     "spelling", "reword", "update copyright"
 )
+# Plain substring semantics, matched by a single C-level scan of the message.
+TRIVIAL_RE = re.compile("|".join(map(re.escape, TRIVIAL_WORDS)), re.IGNORECASE)
 
 CATEGORY_KEYWORDS = {
     "Null-Pointer Dereference (NPD)": [
         r"\bnull\b", r"== *NULL", r"!= *NULL", r"kmalloc",
-        r"kzalloc", r"devm_kzalloc", r"\bptr\b", r"!.*ptr"
+        r"kzalloc", r"devm_kzalloc", r"\bptr\b", r"![^\n]{0,80}ptr"
     ],
-    "Use-Before-Intialization (UBI)": [
+    "Use-Before-Initialization (UBI)": [
         r"uninit", r"initialize", r"= *NULL", r"= *0",
         r"memset", r"set to 0", r"init"
     ],
@@ -55,103 +59,244 @@ CATEGORY_KEYWORDS = {
     "Buffer Overflow": [
         r"memcpy", r"memmove", r"strcpy", r"strncpy",
         r"copy_from_user", r"copy_to_user", r"sizeof",
-        r"min\s*\(.*len", r"buf\["
+        r"min\s*\([^\n]{0,80}len", r"buf\["
     ],
     "Memory Leak": [
         r"free", r"kfree", r"release", r"cleanup",
         r"goto err", r"put_device", r"return"
     ],
     "Double Free": [
-        r"free", r"kfree", r"ptr = NULL", r"if *\(.*!.*\)"
+        r"free", r"kfree", r"ptr = NULL", r"if *\([^\n]{0,80}![^\n]{0,80}\)"
     ],
 }
 
+# One case-insensitive alternation per category, compiled once: a single
+# search() per category instead of re-matching every keyword separately.
+# Gaps are bounded ([^\n]{0,80} rather than .*) so a long diff line cannot
+# make a keyword backtrack across the whole line.
+CATEGORY_PATTERNS = {
+    cat: re.compile("|".join(f"(?:{rgx})" for rgx in regexes), re.IGNORECASE)
+    for cat, regexes in CATEGORY_KEYWORDS.items()
+}
+
+# ---------------------------------------------------------------------------
+# Stage 1 — Filter small diffs
 # ---------------------------------------------------------------------------
 
-os.makedirs(OUTPUT_PATH, exist_ok=True)
+# One `git log` stream yields metadata + per-file numstat for every commit in
+# the range, replacing gitpython's per-commit `git diff --numstat` forks.
+# Fields are \x1f-separated; -z NUL-terminates the header and each numstat entry.
+LOG_FORMAT = "%H%x1f%P%x1f%an%x1f%ae%x1f%cI%x1f%B%x1f"
 
-# Load category order
-with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
-    BUG_CATEGORIES = json.load(f)
 
-categorized = {cat: [] for cat in BUG_CATEGORIES}
+def iter_commit_stats(rev_range):
+    """Yield one dict per non-merge commit in `rev_range`, with its numstat entries."""
+    proc = subprocess.Popen(
+        ["git", "-C", LINUX_PATH, "log", "-z", "--no-merges", "--no-renames",
+         "--numstat", f"--format={LOG_FORMAT}", rev_range],
+        stdout=subprocess.PIPE,
+        bufsize=1 << 20,
+    )
+    record = None
+    pending = b""
+    for chunk in iter(lambda: proc.stdout.read(1 << 20), b""):
+        *tokens, pending = (pending + chunk).split(b"\0")
+        for token in tokens:
+            text = token.decode("utf-8", "replace")
+            if "\x1f" in text:
+                if record:
+                    yield record
+                sha, parents, author, email, date, message, _ = text.split("\x1f")
+                record = {
+                    "commit": sha.strip(),
+                    "parents": parents.split(),
+                    # Authors and paths repeat across thousands of commits.
+                    "author": sys.intern(author),
+                    "email": sys.intern(email),
+                    "date": date,
+                    "message": message,
+                    "numstat": [],
+                }
+            elif text.strip("\n"):
+                added, deleted, path = text.strip("\n").split("\t", 2)
+                record["numstat"].append((added, deleted, sys.intern(path)))
+    if record:
+        yield record
+    if proc.wait() != 0:
+        raise RuntimeError(f"git log {rev_range} failed with exit code {proc.returncode}")
 
-repo = Repo(LINUX_PATH)
-assert not repo.bare, f"Repository at {LINUX_PATH} not found or invalid."
 
-start = repo.tags[START_TAG]
-end = repo.tags[END_TAG]
-commits = list(repo.iter_commits(f"{start.commit.hexsha}..{end.commit.hexsha}", no_merges=True))
-print(f"Scanning {len(commits)} commits between {START_TAG} and {END_TAG}...")
+def filter_commit(record):
+    """Return the record (sans diff) if it is a small, non-trivial C change, else None."""
+    if TRIVIAL_RE.search(record["message"]):
+        return None
 
-filtered = []
+    # Cheapest tests first: file count and extensions are plain path checks,
+    # so most rejects never sum the per-file line counts.
+    numstat = record["numstat"]
+    if not numstat or len(numstat) > MAX_FILES_CHANGED or not record["parents"]:
+        return None
+    changed_files = [path for _, _, path in numstat if path.endswith(ALLOWED_FILE_EXT)]
+    if not changed_files:
+        return None
 
-# ---------------------------------------------------------------------------
-# Stage 1 — Filter small diffs
-# ---------------------------------------------------------------------------
-for commit in tqdm(commits, desc="Filtering small diffs", ncols=100):
-    msg_lower = commit.message.lower()
-    if any(word in msg_lower for word in TRIVIAL_WORDS):
-        continue
-
-    stats = commit.stats.total
-    total_changes = stats["insertions"] + stats["deletions"]
-    total_files = stats["files"]
+    # Binary files report "-" for both counts in numstat; they add no lines.
+    insertions = sum(int(a) for a, _, _ in numstat if a != "-")
+    deletions = sum(int(d) for _, d, _ in numstat if d != "-")
+    total_changes = insertions + deletions
     if total_changes == 0 or total_changes > MAX_LINES_CHANGED:
-        continue
-    if total_files == 0 or total_files > MAX_FILES_CHANGED:
-        continue
+        return None
+
+    return {
+        "commit": record["commit"],
+        "parent": record["parents"][0],
+        "author": record["author"],
+        "email": record["email"],
+        "date": record["date"],
+        "message": record["message"].strip(),
+        "files_changed": changed_files,
+        "insertions": insertions,
+        "deletions": deletions,
+    }
 
-    changed_files = [f for f in commit.stats.files.keys() if f.endswith(ALLOWED_FILE_EXT)]
-    if not changed_files or not commit.parents:
-        continue
 
+DIFF_BATCH_SIZE = 64
+
+
+def git_show(shas):
+    return subprocess.run(
+        ["git", "-C", LINUX_PATH, "show", "--no-color", "--unified=3",
+         "--format=%x00%H", *shas],
+        capture_output=True, check=True,
+    ).stdout.decode("utf-8", "replace")
+
+
+def fetch_diffs(shas):
+    """Return {sha: unified diff} for a batch of commits with one `git show`."""
     try:
-        diff_text = repo.git.diff(commit.parents[0].hexsha, commit.hexsha, unified=3)
-    except Exception:
-        continue
-
-    filtered.append({
-        "commit": commit.hexsha,
-        "parent": commit.parents[0].hexsha,
-        "author": commit.author.name,
-        "email": commit.author.email,
-        "date": commit.committed_datetime.isoformat(),
-        "message": commit.message.strip(),
-        "files_changed": changed_files,
-        "insertions": stats["insertions"],
-        "deletions": stats["deletions"],
-        "diff": diff_text,
-    })
+        out = git_show(shas)
+    except subprocess.CalledProcessError:
+        # One bad sha fails the whole batch; retry one by one so only it is lost.
+        parts, skipped = [], 0
+        for sha in shas:
+            try:
+                parts.append(git_show([sha]))
+            except subprocess.CalledProcessError:
+                skipped += 1
+        print(f"⚠️ git show failed for a batch of {len(shas)}; skipped {skipped} commit(s)",
+              file=sys.stderr)
+        out = "".join(parts)
+
+    # Each commit renders as "\0<sha>\n\n<diff>"; its patch equals
+    # `git diff <first parent> <sha>` for the non-merge commits we keep.
+    diffs = {}
+    for chunk in out.split("\0")[1:]:
+        sha, _, diff = chunk.partition("\n")
+        diffs[sha] = diff[1:].removesuffix("\n")
+    return diffs
 
-print(f"✅ Stage 1 complete — {len(filtered)} small commits retained")
+
+def filter_small_commits(rev_range):
+    """Filter on streamed stats first; only survivors have their diffs fetched."""
+    candidates = []
+    scanned = 0
+    for record in tqdm(iter_commit_stats(rev_range), desc="Filtering small diffs", ncols=100):
+        scanned += 1
+        entry = filter_commit(record)
+        if entry:
+            candidates.append(entry)
+    print(f"Scanned {scanned} commits; fetching diffs for {len(candidates)} candidates...")
+
+    # Workers ship back only the diff text; entries stay in this process so
+    # their interned author/path strings are not duplicated by pickling.
+    batches = [[entry["commit"] for entry in candidates[i:i + DIFF_BATCH_SIZE]]
+               for i in range(0, len(candidates), DIFF_BATCH_SIZE)]
+    diffs = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for batch_diffs in tqdm(ex.map(fetch_diffs, batches), total=len(batches),
+                                desc="Fetching diffs", ncols=100):
+            diffs.update(batch_diffs)
+
+    filtered = []
+    for entry in candidates:
+        entry["diff"] = diffs.get(entry["commit"], "")
+        if entry["diff"]:
+            filtered.append(entry)
+    return filtered
 
 # ---------------------------------------------------------------------------
-# Stage 2 — Multi‑category classification
+# Stage 2 — Multi‑category classification
 # ---------------------------------------------------------------------------
 
-for commit in tqdm(filtered, desc="Classifying commits", ncols=100):
-    text = (commit["message"] + "\n" + commit["diff"]).lower()
-    matched = False
-    for cat, regexes in CATEGORY_KEYWORDS.items():
-        if any(re.search(rgx, text) for rgx in regexes):
-            categorized[cat].append(commit)
-            matched = True
-    # you can track unmatched ones if desired
-    # if not matched: Uncategorized.append(commit)
+def classify(filtered, categories):
+    """Return (commits, by_category): each matched commit once, categories as indices."""
+    commits = []
+    by_category = {cat: [] for cat in categories}
+    for commit in tqdm(filtered, desc="Classifying commits", ncols=100):
+        # Search message and diff in place; no combined (50KB+) copy per commit.
+        message, diff = commit["message"], commit["diff"]
+        matched = [cat for cat, pattern in CATEGORY_PATTERNS.items()
+                   if pattern.search(message) or pattern.search(diff)]
+        # you can track unmatched ones if desired
+        # if not matched: Uncategorized.append(commit)
+        if matched:
+            for cat in matched:
+                by_category[cat].append(len(commits))
+            commits.append(commit)
+    return commits, by_category
 
 # ---------------------------------------------------------------------------
-# Stage 3 — Save + summaries
+# Stage 3 — Save + summaries
+# ---------------------------------------------------------------------------
+
+def save(commits, by_category, categories):
+    # Multi-label output stores every commit (and its diff) exactly once;
+    # categories refer to it by index into "commits".
+    # Stream one encoded commit at a time instead of handing the whole
+    # list (with every diff string) to the encoder at once.
+    # orjson emits compact UTF-8 bytes directly, no indent whitespace; a
+    # 1 MiB buffer batches the many small per-record writes into few syscalls.
+    with open(OUTPUT_FILE, "wb", buffering=1 << 20) as f:
+        f.write(b'{\n"commits": [')
+        for i, commit in enumerate(commits):
+            f.write((b"," if i else b"") + b"\n  " + orjson.dumps(commit))
+        f.write(b'\n],\n"by_category": {')
+        for i, cat in enumerate(categories):
+            f.write((b"," if i else b"") + b"\n  " + orjson.dumps(cat) + b": "
+                    + orjson.dumps(by_category[cat]))
+        f.write(b"\n}\n}\n")
+
+    print(f"\n✅ Stage 2 complete — {len(commits)} unique commits across "
+          f"{len(categories)} categories (multi‑label)")
+    print(f"📦 Output → {OUTPUT_FILE}\n")
+
+    # Per‑category summary
+    for cat in categories:
+        print(f"{cat:<35} {len(by_category[cat]):5d}")
+
 # ---------------------------------------------------------------------------
-with open(OUTPUT_FILE, "w", encoding="utf-8", errors="replace") as f:
-    json.dump(categorized, f, indent=2, ensure_ascii=False)
 
-unique_commits = {c["commit"] for lst in categorized.values() for c in lst}
+def main():
+    os.makedirs(OUTPUT_PATH, exist_ok=True)
+
+    # Load category order
+    with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
+        bug_categories = json.load(f)
+
+    # Resolve both tags in one call; a missing repo or tag fails here.
+    start, end = subprocess.run(
+        ["git", "-C", LINUX_PATH, "rev-parse",
+         f"{START_TAG}^{{commit}}", f"{END_TAG}^{{commit}}"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    print(f"Scanning commits between {START_TAG} and {END_TAG}...")
+
+    filtered = filter_small_commits(f"{start}..{end}")
+    print(f"✅ Stage 1 complete — {len(filtered)} small commits retained")
+
+    commits, by_category = classify(filtered, bug_categories)
+    save(commits, by_category, bug_categories)
 
-print(f"\n✅ Stage 2 complete — {len(unique_commits)} unique commits across "
-      f"{len(BUG_CATEGORIES)} categories (multi‑label)")
-print(f"📦 Output → {OUTPUT_FILE}\n")
 
-# Per‑category summary
-for cat in BUG_CATEGORIES:
-    print(f"{cat:<35} {len(categorized[cat]):5d}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
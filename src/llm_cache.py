@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+llm_cache.py
+------------
+Persistent prompt → response cache for the agentic pipeline.
+
+Responses are keyed by SHA-256 over (model, temperature, system, prompt) and stored
+in a small SQLite database, so re-running the pipeline on an unchanged
+dataset replays earlier answers from disk instead of calling the LLM again.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class LLMCache:
+    """Exact-match response cache backed by SQLite."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " prompt_hash TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT,"
+            " ts REAL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def key(model: str, prompt: str, temperature: float, system: str = "") -> str:
+        text = f"{model}\0{temperature}\0{system}\0{prompt}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str, temperature: float, system: str = "") -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT response FROM responses WHERE prompt_hash = ?",
+            (self.key(model, prompt, temperature, system),),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model: str, prompt: str, temperature: float, response: str,
+            system: str = "") -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+            (self.key(model, prompt, temperature, system), model, response, time.time()),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
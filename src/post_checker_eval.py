@@ -5,12 +5,12 @@ post_checker_eval.py
 Build the custom CSA checker, optionally run lightweight smoke tests,
 and (by default) execute a kernel workflow that:
 
-  * checks out Linux v5.9 in the `linux/` submodule,
-  * generates a compile_commands.json for that revision,
-  * runs the Null Pointer Dereference checker over the translation units,
-  * repeats the process for v5.17,
+  * checks out Linux v5.9 and v5.17 as worktrees of the `linux/` submodule,
+  * generates a compile_commands.json for each revision,
+  * runs the Null Pointer Dereference checker over the translation units
+    (both revisions concurrently),
   * compares the diagnostics to determine which reports disappeared or remained,
-  * restores the submodule to its original (pinned) revision.
+  * removes the worktrees (unless --keep-cdb), leaving the submodule checkout untouched.
 
 Requirements
 ------------
@@ -22,30 +22,46 @@ Requirements
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import hashlib
 import os
-import re
+import pickle
 import shlex
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Set
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+import orjson
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 CHECKER_SOURCE = BASE_DIR / "GeneratedNPDChecker.cpp"
 CHECKER_LIBRARY = BASE_DIR / "libNPDChecker.so"
 LINUX_SUBMODULE = BASE_DIR / "linux"
+WORKTREE_ROOT = BASE_DIR / ".worktrees"
 DEFAULT_RESULTS_DIR = BASE_DIR / "analysis_results"
 CHECKER_NAME = "squire.NPDChecker"
 
+# Compile DB filtering: only these sources are analyzed, and these compile
+# flags are dropped (the second set together with the value that follows).
+SRC_SUFFIXES = (".c", ".cc", ".cpp")
+DROP_ARGS = {"-c"}
+DROP_ARGS_WITH_VALUE = {"-o"}
+
+# Default checker families whose reports are filtered out anyway; core (and
+# apiModeling) stay on because path-sensitive modeling depends on them.
+# -analyzer-disable-all-checks is not usable: it silences our checker too.
+DISABLED_CHECKERS = "deadcode,security,unix,cplusplus,nullability,valist"
+
 
 @dataclass
 class AnalysisSummary:
     """Structured record for a single kernel revision analysis."""
     tag: str
-    warnings: Set[str]
+    warnings: Set[int]          # warning_id of every key; the keys live in warnings_text
     warnings_text: Path
     warnings_json: Path
     log_dir: Path
@@ -132,6 +148,9 @@ def build_checker(force: bool = False) -> Path:
                 "-fPIC",
                 "-shared",
                 "-std=c++17",
+                # Loaded into every analyzer process; match release LLVM builds.
+                "-O2",
+                "-DNDEBUG",
                 "-I",
                 "/usr/include",
                 str(CHECKER_SOURCE),
@@ -184,14 +203,12 @@ def find_compile_db_tool() -> str:
     )
 
 
+_FILENAME_TABLE = str.maketrans({"/": "__", "\\": "__", ":": "_", " ": "_"})
+
+
 def sanitize_for_filename(fragment: str) -> str:
-    """Create a filesystem-safe token from a path-like fragment."""
-    return (
-        fragment.replace("/", "__")
-        .replace("\\", "__")
-        .replace(":", "_")
-        .replace(" ", "_")
-    )
+    """Create a filesystem-safe token from a path-like fragment (single translate pass)."""
+    return fragment.translate(_FILENAME_TABLE)
 
 
 def ensure_kernel_config(repo: Path, arch: str, defconfig: str, jobs: int) -> None:
@@ -248,54 +265,176 @@ def generate_compile_commands(
     return cdb_path
 
 
-def extract_warnings(
-    diagnostic_text: str,
-    repo_root: Path,
-    entry_directory: Path,
-    pattern: re.Pattern[str],
-) -> List[Dict[str, object]]:
-    """Parse analyzer diagnostics for our checker and normalize paths."""
-    warnings: List[Dict[str, object]] = []
-    if not diagnostic_text:
-        return warnings
+@functools.lru_cache(maxsize=65536)
+def resolve_path(path: str) -> str:
+    """os.path.realpath with memoization; the same headers are reported over and over."""
+    return os.path.realpath(path)
+
+
+def warning_id(key: str) -> int:
+    """Stable 64-bit id for a warning key (cheaper to hash and compare than the string)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def read_warning_keys(path: Path) -> Iterator[str]:
+    """Stream the (sorted, unique) warning keys back from a npd_warnings.txt file."""
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            yield line.rstrip("\n")
+
+
+def parse_warning_line(
+    line: str,
+    repo_root_resolved: str,
+    entry_dir_resolved: str,
+) -> Optional[Dict[str, object]]:
+    """Parse one analyzer output line for our checker and normalize its path.
+
+    Lines have the fixed shape `path:line:col: severity: message`, so a
+    bounded split replaces the regex match on every candidate line.
+    """
+    if "Possible NULL dereference" not in line:
+        return None
+    stripped = line.strip()
+    parts = stripped.split(":", 4)
+    if len(parts) != 5:
+        return None
+    path, line_no, col, severity, message = parts
+    severity_name = severity.lstrip()
+    if (
+        not path
+        or not line_no.isdecimal()
+        or not col.isdecimal()
+        or severity_name not in ("warning", "error")
+        or severity_name == severity
+        or not message[:1].isspace()
+        or not message.lstrip().startswith("Possible NULL dereference")
+    ):
+        return None
+
+    # Plain string paths: no Path objects are built per warning.
+    if os.path.isabs(path):
+        abs_path = resolve_path(path)
+    else:
+        abs_path = resolve_path(os.path.join(entry_dir_resolved, path))
 
-    repo_root_resolved = repo_root.resolve(strict=False)
-    entry_dir_resolved = entry_directory.resolve(strict=False)
+    repo_prefix = repo_root_resolved + os.sep
+    rel_path = abs_path[len(repo_prefix):] if abs_path.startswith(repo_prefix) else abs_path
 
-    for line in diagnostic_text.splitlines():
-        if "Possible NULL dereference" not in line:
-            continue
-        match = pattern.match(line.strip())
-        if not match:
-            continue
+    message = message.strip()
+    key = f"{rel_path}:{line_no}:{message}"
 
-        raw_path = Path(match.group("path"))
-        if not raw_path.is_absolute():
-            abs_path = (entry_dir_resolved / raw_path).resolve(strict=False)
-        else:
-            abs_path = raw_path.resolve(strict=False)
+    return {
+        "file": rel_path,
+        "line": int(line_no),
+        "column": int(col),
+        "severity": severity_name,
+        "message": message,
+        "key": key,
+        "raw": stripped,
+    }
 
+
+def load_compile_commands(compile_commands: Path, cache_path: Path) -> List[Dict[str, object]]:
+    """Load a compile DB, reusing a pickled parse that is at least as new as the JSON."""
+    if cache_path.exists() and cache_path.stat().st_mtime >= compile_commands.stat().st_mtime:
+        with cache_path.open("rb") as fh:
+            return pickle.load(fh)
+
+    data = orjson.loads(compile_commands.read_bytes())
+    with cache_path.open("wb") as fh:
+        pickle.dump(data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    return data
+
+
+@functools.lru_cache(maxsize=4096)
+def split_command(command: str) -> tuple:
+    """shlex.split with memoization for compile DBs that repeat identical commands."""
+    return tuple(shlex.split(command))
+
+
+def analyzer_options(mode: str, max_nodes: int) -> List[str]:
+    """Extra clang flags bounding the analyzer's exploration budget."""
+    return [
+        "-Xclang", f"-analyzer-disable-checker={DISABLED_CHECKERS}",
+        "-Xclang", "-analyzer-config", "-Xclang", f"mode={mode}",
+        "-Xclang", "-analyzer-config", "-Xclang", f"max-nodes={max_nodes}",
+    ]
+
+
+def build_analyzer_command(
+    entry: Dict[str, object],
+    checker_so: Path,
+    extra_flags: Sequence[str] = (),
+) -> List[str]:
+    """Turn a compile_commands entry into a clang --analyze invocation (empty if unusable)."""
+    arguments: List[str]
+    if "arguments" in entry and entry["arguments"]:
+        arguments = list(entry["arguments"])
+    else:
+        arguments = list(split_command(entry["command"]))
+
+    if not arguments:
+        return []
+
+    compiler = arguments[0]
+    filtered_args: List[str] = [compiler, "--analyze"]
+    filtered_args += [
+        "-Xclang", "-load", "-Xclang", str(checker_so),
+        "-Xclang", f"-analyzer-checker={CHECKER_NAME}",
+        *extra_flags,
+        "-fno-color-diagnostics",
+    ]
+
+    rest = iter(arguments[1:])
+    for arg in rest:
+        if arg in DROP_ARGS_WITH_VALUE:
+            next(rest, None)
+        elif arg not in DROP_ARGS and not arg.startswith("-o"):
+            filtered_args.append(arg)
+    return filtered_args
+
+
+def analyze_unit(
+    idx: int,
+    file_path: str,
+    directory: Path,
+    cmd: List[str],
+    repo: Path,
+    logs_dir: Path,
+) -> List[Dict[str, object]]:
+    """Analyze one translation unit, parsing clang's merged output as it streams."""
+    repo_root_resolved = resolve_path(str(repo))
+    entry_dir_resolved = resolve_path(str(directory))
+
+    output: List[str] = []
+    parsed: List[Dict[str, object]] = []
+    with subprocess.Popen(
+        cmd,
+        cwd=str(directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    ) as proc:
+        for line in proc.stdout:
+            output.append(line)
+            warning = parse_warning_line(line, repo_root_resolved, entry_dir_resolved)
+            if warning:
+                parsed.append(warning)
+
+    if parsed:
+        processed_file = Path(file_path)
         try:
-            rel_path = abs_path.relative_to(repo_root_resolved)
-        except ValueError:
-            rel_path = abs_path
-
-        message = match.group("message").strip()
-        severity = match.group("severity")
-        key = f"{rel_path}:{match.group('line')}:{message}"
-
-        warnings.append(
-            {
-                "file": str(rel_path),
-                "line": int(match.group("line")),
-                "column": int(match.group("col")),
-                "severity": severity,
-                "message": message,
-                "key": key,
-                "raw": line.strip(),
-            }
-        )
-    return warnings
+            rel_file = processed_file.resolve().relative_to(repo.resolve())
+        except Exception:
+            rel_file = processed_file
+        log_name = f"{idx:05d}_{sanitize_for_filename(str(rel_file))}.log"
+        # At most 1000 logs per directory keeps dirent lookups cheap.
+        shard_dir = logs_dir / f"{idx // 1000:04d}"
+        shard_dir.mkdir(exist_ok=True)
+        (shard_dir / log_name).write_text("".join(output))
+    return parsed
 
 
 def run_static_analyzer(
@@ -305,118 +444,101 @@ def run_static_analyzer(
     tag: str,
     limit: Optional[int],
     results_dir: Path,
+    jobs: int = 1,
+    only_files: Optional[Set[str]] = None,
+    pretty_json: bool = False,
+    analyzer_flags: Sequence[str] = (),
 ) -> AnalysisSummary:
-    """Replay compile commands with clang --analyze and collect diagnostics."""
+    """Replay compile commands with clang --analyze (up to `jobs` at once) and collect diagnostics.
+
+    With `only_files` (repo-relative paths), units whose source is not listed are skipped.
+    """
     print(f"[analyze:{tag}] using compile_commands: {compile_commands}")
-    data = json.loads(compile_commands.read_text())
+    data = load_compile_commands(compile_commands, results_dir / "compile_commands.pkl")
     total_units = len(data)
     print(f"[analyze:{tag}] total compilation units in database: {total_units}")
 
     logs_dir = results_dir / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
+    # resolve_path's memo is shared by concurrently analyzed tags; that is safe
+    # because each tag lives in its own worktree, so their paths never collide.
+    repo_prefix = resolve_path(str(repo)) + os.sep
 
-    pattern = re.compile(
-        r"^(?P<path>[^:\n]+):(?P<line>\d+):(?P<col>\d+):\s+"
-        r"(?P<severity>warning|error):\s+(?P<message>Possible NULL dereference.*)$"
-    )
-
-    processed = 0
-    diagnostics: List[Dict[str, object]] = []
-    warning_keys: Set[str] = set()
-
+    units = []
     for idx, entry in enumerate(data):
-        if limit is not None and processed >= limit:
+        if limit is not None and len(units) >= limit:
             break
 
         file_path = entry.get("file")
         if not file_path:
             continue
-        if not file_path.endswith((".c", ".cc", ".cpp")):
+        if not file_path.endswith(SRC_SUFFIXES):
             continue
 
         directory = Path(entry.get("directory", str(repo)))
-        arguments: List[str]
-        if "arguments" in entry and entry["arguments"]:
-            arguments = list(entry["arguments"])
-        else:
-            arguments = shlex.split(entry["command"])
-
-        if not arguments:
-            continue
-
-        compiler = arguments[0]
-        filtered_args: List[str] = [compiler, "--analyze"]
-        filtered_args += [
-            "-Xclang", "-load", "-Xclang", str(checker_so),
-            "-Xclang", f"-analyzer-checker={CHECKER_NAME}",
-            "-fno-color-diagnostics",
-        ]
-
-        skip_next = False
-        for arg in arguments[1:]:
-            if skip_next:
-                skip_next = False
+        if only_files is not None:
+            source = resolve_path(os.path.join(directory, file_path))
+            if source.removeprefix(repo_prefix) not in only_files:
                 continue
-            if arg == "-c":
-                continue
-            if arg == "-o":
-                skip_next = True
-                continue
-            if arg.startswith("-o"):
-                continue
-            filtered_args.append(arg)
-
-        result = run_command(
-            filtered_args,
-            cwd=directory,
-            capture_output=True,
-            check=False,
-        )
+        cmd = build_analyzer_command(entry, checker_so, analyzer_flags)
+        if not cmd:
+            continue
+        units.append((idx, file_path, directory, cmd))
 
-        combined_output = ""
-        if result.stdout:
-            combined_output += result.stdout
-        if result.stderr:
-            combined_output += result.stderr
-
-        parsed = extract_warnings(combined_output, repo, directory, pattern)
-        if parsed:
-            processed_file = Path(file_path)
-            try:
-                rel_file = processed_file.resolve().relative_to(repo.resolve())
-            except Exception:
-                rel_file = processed_file
-            log_name = f"{idx:05d}_{sanitize_for_filename(str(rel_file))}.log"
-            (logs_dir / log_name).write_text(combined_output)
+    processed = 0
+    diagnostics: List[Dict[str, object]] = []
+    warnings: Set[int] = set()
 
+    warnings_txt = results_dir / "npd_warnings.txt"
+    warnings_json = results_dir / "npd_warnings.json"
+    # Keys are appended as first seen and sorted on disk at the end; only
+    # their 64-bit ids stay in memory, and comparison reads the keys back.
+    unsorted_txt = warnings_txt.with_suffix(".unsorted")
+
+    # Each TU is an independent clang process; threads only wait on them.
+    # Results are merged in database order so the output stays deterministic.
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor, \
+            unsorted_txt.open("w", encoding="utf-8") as unsorted_fh:
+        futures = [
+            executor.submit(analyze_unit, *unit, repo, logs_dir)
+            for unit in units
+        ]
+        for future in futures:
+            parsed = future.result()
             for diag in parsed:
-                if diag["key"] not in warning_keys:
-                    warning_keys.add(diag["key"])
+                diag_id = warning_id(diag["key"])
+                if diag_id not in warnings:
+                    warnings.add(diag_id)
                     diagnostics.append(diag)
-
-        processed += 1
-        if processed % 50 == 0 or parsed:
-            print(
-                f"[analyze:{tag}] processed {processed} units "
-                f"(warnings collected: {len(warning_keys)})",
-                flush=True,
-            )
+                    unsorted_fh.write(f"{diag['key']}\n")
+
+            processed += 1
+            if processed % 50 == 0 or parsed:
+                print(
+                    f"[analyze:{tag}] processed {processed} units "
+                    f"(warnings collected: {len(warnings)})",
+                    flush=True,
+                )
+
+    # LC_ALL=C sorts by byte value, i.e. the same order as Python's sorted().
+    run_command(
+        ["sort", "-u", "-o", warnings_txt, unsorted_txt],
+        env={**os.environ, "LC_ALL": "C"},
+    )
+    unsorted_txt.unlink()
 
     diagnostics.sort(key=lambda item: item["key"])
-    warnings_txt = results_dir / "npd_warnings.txt"
-    warnings_json = results_dir / "npd_warnings.json"
-
-    warnings_txt.write_text("\n".join(sorted(warning_keys)) + ("\n" if warning_keys else ""))
-    warnings_json.write_text(json.dumps(diagnostics, indent=2))
+    json_options = orjson.OPT_APPEND_NEWLINE | (orjson.OPT_INDENT_2 if pretty_json else 0)
+    warnings_json.write_bytes(orjson.dumps(diagnostics, option=json_options))
 
     print(
         f"[analyze:{tag}] completed {processed} units; "
-        f"{len(warning_keys)} unique warnings recorded."
+        f"{len(warnings)} unique warnings recorded."
     )
 
     return AnalysisSummary(
         tag=tag,
-        warnings=warning_keys,
+        warnings=warnings,
         warnings_text=warnings_txt,
         warnings_json=warnings_json,
         log_dir=logs_dir,
@@ -436,20 +558,22 @@ def analyze_kernel_revision(
     reuse_cdb: bool,
     keep_cdb: bool,
     build_tool: str,
+    only_files: Optional[Set[str]] = None,
+    pretty_json: bool = False,
+    analyzer_flags: Sequence[str] = (),
 ) -> AnalysisSummary:
-    """Checkout a specific kernel tag, generate compile DB, run analyzer, and archive results."""
+    """Generate compile DB for a tag's fresh worktree, run analyzer, and archive results."""
     print(f"\n[kernel] ===== Analyzing Linux {tag} =====")
-    git(repo, ["checkout", tag])
-    git(repo, ["reset", "--hard", "HEAD"])
-    git(repo, ["clean", "-fdx"])
-
     per_tag_results = results_root / tag.replace("/", "_")
     per_tag_results.mkdir(parents=True, exist_ok=True)
 
     stored_cdb = per_tag_results / "compile_commands.json"
     repo_cdb = repo / "compile_commands.json"
+    reuse = reuse_cdb and stored_cdb.exists()
 
-    if reuse_cdb and stored_cdb.exists():
+    # `repo` is a worktree add_worktree() just created at `tag`: already
+    # checked out and clean, so no checkout/clean is needed here.
+    if reuse:
         print(f"[kernel:{tag}] reusing previously captured compile_commands.json")
         shutil.copy2(stored_cdb, repo_cdb)
     else:
@@ -466,6 +590,10 @@ def analyze_kernel_revision(
         tag=tag,
         limit=limit,
         results_dir=per_tag_results,
+        jobs=jobs,
+        only_files=only_files,
+        pretty_json=pretty_json,
+        analyzer_flags=analyzer_flags,
     )
 
     if not keep_cdb and repo_cdb.exists():
@@ -474,19 +602,20 @@ def analyze_kernel_revision(
     return summary
 
 
-def restore_linux_repo(
-    repo: Path,
-    original_branch: Optional[str],
-    original_commit: str,
-) -> None:
-    """Reset the linux submodule to its initial state."""
-    print("\n[kernel] restoring linux submodule to original state …")
-    git(repo, ["clean", "-fdx"])
-    git(repo, ["checkout", original_commit])
-    if original_branch and original_branch != "HEAD":
-        git(repo, ["checkout", original_branch])
-        git(repo, ["reset", "--hard", original_commit])
-    git(repo, ["clean", "-fdx"])
+def add_worktree(repo: Path, path: Path, tag: str) -> None:
+    """Create (or recreate) a detached worktree of `repo` at `tag`."""
+    if path.exists():
+        git(repo, ["worktree", "remove", "--force", path], check=False)
+    git(repo, ["worktree", "prune"])
+    git(repo, ["worktree", "add", "--detach", "--force", path, tag])
+
+
+def remove_worktrees(repo: Path, paths: Sequence[Path]) -> None:
+    """Remove analysis worktrees; the submodule's own checkout is never touched."""
+    print("\n[kernel] removing analysis worktrees …")
+    for path in paths:
+        git(repo, ["worktree", "remove", "--force", path], check=False)
+    git(repo, ["worktree", "prune"])
 
 
 def compare_summaries(
@@ -503,9 +632,14 @@ def compare_summaries(
     baseline = summaries[baseline_tag]
     latest = summaries[latest_tag]
 
-    fixed = sorted(baseline.warnings - latest.warnings)
-    persistent = sorted(baseline.warnings & latest.warnings)
-    regressions = sorted(latest.warnings - baseline.warnings)
+    # Membership is tested on the integer ids while the keys stream back from
+    # the sorted warnings files, so the lists come out already sorted.
+    fixed: List[str] = []
+    persistent: List[str] = []
+    for key in read_warning_keys(baseline.warnings_text):
+        (persistent if warning_id(key) in latest.warnings else fixed).append(key)
+    regressions = [key for key in read_warning_keys(latest.warnings_text)
+                   if warning_id(key) not in baseline.warnings]
 
     comparison_md = results_root / f"comparison_{baseline_tag}_vs_{latest_tag}.md"
     with comparison_md.open("w") as fh:
@@ -541,50 +675,74 @@ def compare_summaries(
     )
 
 
-def run_kernel_workflow(args: argparse.Namespace, checker_path: Path) -> None:
-    """Top-level orchestration for Linux kernel analysis."""
+def prepare_linux_repo() -> None:
+    """Make sure the linux submodule exists and has every tag."""
     ensure_linux_submodule()
     if not LINUX_SUBMODULE.exists():
         raise FileNotFoundError("linux/ submodule is missing after initialization attempt.")
 
     git(LINUX_SUBMODULE, ["fetch", "--tags"])
 
-    original_commit = git(
-        LINUX_SUBMODULE,
-        ["rev-parse", "HEAD"],
-        capture_output=True,
-    ).stdout.strip()
-    original_branch = git(
-        LINUX_SUBMODULE,
-        ["rev-parse", "--abbrev-ref", "HEAD"],
-        capture_output=True,
-    ).stdout.strip()
 
+def run_kernel_workflow(args: argparse.Namespace, checker_path: Path) -> None:
+    """Top-level orchestration for Linux kernel analysis (expects prepare_linux_repo first)."""
     results_root = args.output_dir.resolve()
     results_root.mkdir(parents=True, exist_ok=True)
 
     summaries: Dict[str, AnalysisSummary] = {}
     build_tool = find_compile_db_tool()
 
+    changed_files: Optional[Set[str]] = None
+    if args.diff_filter and len(args.tags) >= 2:
+        changed_files = set(
+            git(
+                LINUX_SUBMODULE,
+                ["diff", "--name-only", "--no-renames", args.tags[0], args.tags[-1]],
+                capture_output=True,
+            ).stdout.splitlines()
+        )
+        print(f"[kernel] --diff-filter: {len(changed_files)} files changed between "
+              f"{args.tags[0]} and {args.tags[-1]}")
+
+    # Each tag gets its own worktree so the revisions build and analyze side
+    # by side; make/analyzer parallelism is split between them.
+    worktrees = {tag: WORKTREE_ROOT / tag.replace("/", "_") for tag in args.tags}
+    jobs_per_tag = max(1, args.jobs // len(worktrees))
+    analyzer_flags = analyzer_options(args.analyzer_mode, args.analyzer_max_nodes)
+
     try:
-        for tag in args.tags:
-            summary = analyze_kernel_revision(
-                repo=LINUX_SUBMODULE,
-                tag=tag,
-                checker_so=checker_path,
-                arch=args.arch,
-                defconfig=args.defconfig,
-                jobs=args.jobs,
-                make_target=args.make_target,
-                limit=args.analysis_limit,
-                results_root=results_root,
-                reuse_cdb=args.reuse_cdb,
-                keep_cdb=args.keep_cdb,
-                build_tool=build_tool,
-            )
-            summaries[tag] = summary
+        for tag, path in worktrees.items():
+            add_worktree(LINUX_SUBMODULE, path, tag)
+
+        with ThreadPoolExecutor(max_workers=len(worktrees)) as executor:
+            futures = {
+                tag: executor.submit(
+                    analyze_kernel_revision,
+                    repo=path,
+                    tag=tag,
+                    checker_so=checker_path,
+                    arch=args.arch,
+                    defconfig=args.defconfig,
+                    jobs=jobs_per_tag,
+                    make_target=args.make_target,
+                    limit=args.analysis_limit,
+                    results_root=results_root,
+                    reuse_cdb=args.reuse_cdb,
+                    keep_cdb=args.keep_cdb,
+                    build_tool=build_tool,
+                    only_files=changed_files,
+                    pretty_json=args.pretty_json,
+                    analyzer_flags=analyzer_flags,
+                )
+                for tag, path in worktrees.items()
+            }
+            for tag, future in futures.items():
+                summaries[tag] = future.result()
     finally:
-        restore_linux_repo(LINUX_SUBMODULE, original_branch, original_commit)
+        if args.keep_cdb:
+            print(f"\n[kernel] keeping worktrees and their compile_commands.json under {WORKTREE_ROOT}")
+        else:
+            remove_worktrees(LINUX_SUBMODULE, list(worktrees.values()))
 
     if len(args.tags) >= 2:
         compare_summaries(
@@ -631,7 +789,7 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         "--jobs",
         type=int,
         default=os.cpu_count() or 4,
-        help="Parallelism for make (default: number of CPUs).",
+        help="Parallelism for make and for analyzer runs (default: number of CPUs).",
     )
     parser.add_argument(
         "--analysis-limit",
@@ -639,6 +797,24 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=None,
         help="Optional cap on the number of translation units analyzed per tag (for quick trials).",
     )
+    parser.add_argument(
+        "--diff-filter",
+        action="store_true",
+        help="Only analyze translation units whose source file changed between the first "
+        "and last tag (header-only changes are not followed).",
+    )
+    parser.add_argument(
+        "--analyzer-mode",
+        choices=["shallow", "deep"],
+        default="shallow",
+        help="Analyzer exploration mode per translation unit (default: shallow).",
+    )
+    parser.add_argument(
+        "--analyzer-max-nodes",
+        type=int,
+        default=75000,
+        help="Exploded-graph node budget per analyzed function (default: 75000).",
+    )
     parser.add_argument(
         "--reuse-cdb",
         action="store_true",
@@ -647,7 +823,8 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser.add_argument(
         "--keep-cdb",
         action="store_true",
-        help="Do not delete compile_commands.json from the repo after analysis.",
+        help="Keep each tag's worktree under .worktrees/, with its compile_commands.json, "
+        "after analysis (a copy is always archived in the tag's results directory).",
     )
     parser.add_argument(
         "--output-dir",
@@ -655,6 +832,11 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=DEFAULT_RESULTS_DIR,
         help="Destination directory for analysis artifacts.",
     )
+    parser.add_argument(
+        "--pretty-json",
+        action="store_true",
+        help="Indent npd_warnings.json for reading (default: compact).",
+    )
     parser.add_argument(
         "--force-rebuild",
         action="store_true",
@@ -666,10 +848,15 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 def main(argv: Optional[Sequence[str]] = None) -> None:
     args = parse_args(argv)
     try:
-        checker_path = build_checker(force=args.force_rebuild)
         if args.mode == "smoke":
-            run_smoke_tests(checker_path)
+            run_smoke_tests(build_checker(force=args.force_rebuild))
         else:
+            # The clang++ build and the submodule fetch are independent.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                checker_future = executor.submit(build_checker, force=args.force_rebuild)
+                repo_future = executor.submit(prepare_linux_repo)
+                checker_path = checker_future.result()
+                repo_future.result()
             run_kernel_workflow(args, checker_path)
     except CommandError as exc:
         if exc.stdout:
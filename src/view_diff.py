@@ -10,8 +10,9 @@ and dataset toggle (Raw ↔ Curated).
 • "Source" dropdown toggles between raw / curated JSONs
 """
 
-import os, sys, json, webbrowser
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import os, sys, atexit, gzip, hashlib, signal, socket, tempfile, threading, time, webbrowser
+import orjson
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import parse_qs, urlparse
 from html import escape
 
@@ -38,19 +39,152 @@ if not RAW_FILE:
     print("❌ No categorized file in mined_patches_raw/")
     sys.exit(1)
 
-with open(RAW_FILE, "r", encoding="utf-8", errors="replace") as f:
-    RAW_DATA = json.load(f)
+with open(RAW_FILE, "rb") as f:
+    RAW_DATA = orjson.loads(f.read())
+# Deduplicated output ({"commits": [...], "by_category": {cat: [idx]}}) →
+# cat → list of commits; entries are shared, not copied.
+if "by_category" in RAW_DATA:
+    RAW_DATA = {cat: [RAW_DATA["commits"][i] for i in idxs]
+                for cat, idxs in RAW_DATA["by_category"].items()}
 
 if os.path.exists(CURATED_FILE):
-    with open(CURATED_FILE, "r", encoding="utf-8", errors="replace") as f:
-        CURATED_DATA = json.load(f)
+    with open(CURATED_FILE, "rb") as f:
+        CURATED_DATA = orjson.loads(f.read())
 else:
     CURATED_DATA = {cat: [] for cat in RAW_DATA.keys()}
-    with open(CURATED_FILE, "w", encoding="utf-8") as f:
-        json.dump(CURATED_DATA, f, indent=2, ensure_ascii=False)
+    with open(CURATED_FILE, "wb") as f:
+        f.write(orjson.dumps(CURATED_DATA, option=orjson.OPT_INDENT_2))
 
 CATEGORIES = list(RAW_DATA.keys())
+# O(1) lookups for mark/unmark; CURATED_DATA stays the persisted list.
+RAW_INDEX = {cat: {c["commit"]: c for c in arr} for cat, arr in RAW_DATA.items()}
+CURATED_SET = {cat: {c["commit"] for c in arr} for cat, arr in CURATED_DATA.items()}
+# Parallel to CURATED_DATA[cat]: position of a hash is the position of its entry.
+CURATED_HASHES = {cat: [c["commit"] for c in arr] for cat, arr in CURATED_DATA.items()}
 CURRENT_SRC = "raw"        # default dataset shown
+CURATED_LOCK = threading.Lock()   # serializes mark/unmark (and flush snapshots)
+CURATED_VERSION = 0               # bumped per change; with the boot id, the /curated ETag
+BOOT_ID = os.urandom(4).hex()     # a restart must not reuse a cached version's ETag
+
+# ---------------------------------------------------------------------
+# Pre-encoded responses: /category and /diff write cached bytes instead of
+# re-serializing (multi-KB diffs) on every request. Curated is re-encoded
+# per category on mark/unmark.
+# /diff bodies are spilled to one anonymous temp file, not kept on the heap,
+# and sent from there with sendfile(); CACHE holds their (offset, size).
+# Every body is kept twice, plain and gzipped: (plain, gz).
+# /category only lists summaries, as a JSON array or as NDJSON lines, each
+# with an ETag; the diff itself comes from /diff?idx=, already colorized as
+# HTML so the page only assigns innerHTML.
+# ---------------------------------------------------------------------
+SUMMARY_KEYS = ("commit", "author", "date", "insertions", "deletions")
+
+def encode(obj): return orjson.dumps(obj)   # UTF-8 bytes, ready to write
+
+def diff_html(diff):
+    out = []
+    for line in diff.split("\n"):
+        cls = "add" if line.startswith("+") else "del" if line.startswith("-") else "info"
+        out.append(f"<span class='{cls}'>{escape(line, quote=False)}</span>\n")
+    return "".join(out)
+
+def encode_diff(c):
+    # entries stay untouched (they are what gets persisted); only the
+    # response swaps "diff" for "diff_html"
+    out = {k: v for k, v in c.items() if k != "diff"}
+    out["diff_html"] = diff_html(c.get("diff") or "")
+    return encode(out)
+
+DIFF_BLOB = tempfile.TemporaryFile(buffering=0)   # append-only; unbuffered for sendfile
+SPILL_LOCK = threading.Lock()
+
+def spill(body):
+    with SPILL_LOCK:
+        off = DIFF_BLOB.seek(0, os.SEEK_END)
+        DIFF_BLOB.write(body)
+    return off, len(body)
+
+def plain_and_gz(body): return body, gzip.compress(body, compresslevel=6)
+
+# commit hash → its spilled (plain, gz) ranges. A commit is spilled once and
+# shared by every category (raw or curated) that lists it, so re-encoding a
+# curated category on mark/unmark does not grow DIFF_BLOB.
+SPILLED = {}
+
+def spill_entry(c):
+    ranges = SPILLED.get(c["commit"])
+    if ranges is None:
+        body, gz = plain_and_gz(encode_diff(c))
+        ranges = SPILLED[c["commit"]] = (spill(body), spill(gz))
+    return ranges
+
+def with_etag(body):
+    # (plain, gz, etag, gz etag): each encoding is its own representation
+    tag = hashlib.md5(body).hexdigest()
+    return (*plain_and_gz(body), f'"{tag}"', f'"{tag}-gz"')
+
+def encode_category(arr):
+    summaries = [{k: c.get(k) for k in SUMMARY_KEYS} for c in arr]
+    ndjson = b"".join(orjson.dumps(s, option=orjson.OPT_APPEND_NEWLINE) for s in summaries)
+    # {format: (plain, gz, etag, gz etag)}, [per-commit (plain, gz) ranges]
+    return ({"json": with_etag(encode(summaries)), "ndjson": with_etag(ndjson)},
+            [spill_entry(c) for c in arr])
+
+# Raw categories are encoded on first request, so startup and memory only
+# pay for the categories actually opened. Curated is small; built eagerly.
+CACHE = {
+    "raw": {},
+    "curated": {cat: encode_category(arr) for cat, arr in CURATED_DATA.items()},
+}
+RAW_CACHE_LOCK = threading.Lock()
+
+def int_param(qs, name, default):
+    """Non-negative integer query parameter; None if it is malformed or negative."""
+    raw = qs.get(name)
+    if not raw: return default
+    return int(raw[0]) if raw[0].isascii() and raw[0].isdigit() else None
+
+def cached(src, cat):
+    if src == "curated": return CACHE["curated"].get(cat)
+    if cat not in CACHE["raw"] and cat in RAW_DATA:
+        with RAW_CACHE_LOCK:
+            if cat not in CACHE["raw"]:
+                CACHE["raw"][cat] = encode_category(RAW_DATA[cat])
+    return CACHE["raw"].get(cat)
+
+# ---------------------------------------------------------------------
+# Curated persistence: /mark only updates memory and sets CURATED_DIRTY;
+# a background thread writes the file at most every FLUSH_DELAY seconds,
+# and once more at exit.
+# ---------------------------------------------------------------------
+FLUSH_DELAY = 0.5
+CURATED_DIRTY = threading.Event()
+FLUSH_LOCK = threading.Lock()     # one writer of the file (and its .tmp) at a time
+
+def flush_curated():
+    with FLUSH_LOCK:
+        with CURATED_LOCK:
+            if not CURATED_DIRTY.is_set(): return
+            payload = orjson.dumps(CURATED_DATA, option=orjson.OPT_INDENT_2)
+            CURATED_DIRTY.clear()
+        # write a sibling temp file, then rename over: readers never see a torn file
+        tmp = CURATED_FILE + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)   # one write()
+            os.replace(tmp, CURATED_FILE)
+        except OSError:
+            CURATED_DIRTY.set()   # not on disk yet; the next flush retries
+            raise
+
+def flush_loop():
+    while True:
+        CURATED_DIRTY.wait()
+        time.sleep(FLUSH_DELAY)   # let a burst of marks coalesce into one write
+        try:
+            flush_curated()
+        except Exception as e:    # keep the writer alive; CURATED_DIRTY is still set
+            print(f"❌ Could not write {CURATED_FILE}: {e}", file=sys.stderr)
 
 # ---------------------------------------------------------------------
 STYLE = """
@@ -63,17 +197,24 @@ select,input,button{background:#222;color:#ddd;border:1px solid #333;
 button:hover{background:#333;cursor:pointer;}
 #view{margin-top:.6rem;}
 .meta{line-height:1.4em;font-size:.95em;margin-bottom:.4rem;}
-.diff{white-space:pre;font-family:monospace;line-height:1.2em;
+.diff{white-space:pre;font-family:monospace;line-height:16px;position:relative;
   background:#000;border:1px solid #333;padding:1rem;
-  overflow-x:auto;max-height:75vh;margin-top:.4rem;}
+  overflow:auto;max-height:75vh;margin-top:.4rem;}
+.diff .rows{position:absolute;left:1rem;}
 .add{color:#2ecc71;} .del{color:#e74c3c;} .info{color:#888;}
 footer{text-align:center;color:#666;margin-top:.4rem;font-size:.85em;}
 .marked{color:#2ecc71;font-weight:bold;}
 </style>
 <script>
-let category=null,commits=[],idx=0,curated={},source='raw';
+let category=null,commits=[],idx=0,curatedSets={},source='raw';   // category → Set of marked hashes
+// diff view is windowed: only lines near the viewport are in the DOM
+const LINE_PX=16, OVERSCAN=50;
+let diffLines=[], diffFrame=0;
 
-async function initCurated(){let r=await fetch('/curated');curated=await r.json();}
+async function initCurated(){
+  const curated=await (await fetch('/curated')).json();
+  curatedSets=Object.fromEntries(Object.entries(curated).map(([k,v])=>[k,new Set(v.map(c=>c.commit))]));
+}
 
 async function switchSource(sel){
   source = sel.value;
@@ -92,10 +233,25 @@ async function switchSource(sel){
 }
 
 async function loadCategory(cat){
-  category=cat;
-  const res=await fetch(`/category?name=${encodeURIComponent(cat)}&src=${source}`);
-  commits=await res.json(); idx=0;
-  renderCommit();
+  category=cat; commits=[]; idx=0;
+  // marks are refreshed alongside (a 304 when unchanged), not after
+  const [res]=await Promise.all([
+    fetch(`/category?name=${encodeURIComponent(cat)}&src=${source}`,{headers:{Accept:'application/x-ndjson'}}),
+    initCurated()]);
+  // summaries arrive one per line; show the first commit while the rest stream in
+  const reader=res.body.getReader(), dec=new TextDecoder();
+  let buf='', shown=false;
+  for(;;){
+    const {done,value}=await reader.read();
+    if(category!==cat) return reader.cancel();
+    if(done) break;
+    buf+=dec.decode(value,{stream:true});
+    const lines=buf.split('\\n'); buf=lines.pop();
+    lines.forEach(l=>{if(l) commits.push(JSON.parse(l));});
+    if(!shown&&commits.length){shown=true; renderCommit();}
+  }
+  if(!shown) renderCommit();
+  else document.getElementById('status').textContent=`Commit ${idx+1}/${commits.length}`;
 }
 
 async function renderCommit(){
@@ -106,12 +262,7 @@ async function renderCommit(){
   const r=await fetch(`/diff?cat=${encodeURIComponent(category)}&idx=${idx}&src=${source}`);
   const c=await r.json();
   const files=(c.files_changed||[]).join(', ');
-  let diffHTML='';
-  (c.diff||'').split('\\n').forEach(line=>{
-     if(line.startsWith('+')) diffHTML+=`<span class='add'>${line}</span>\\n`;
-     else if(line.startsWith('-')) diffHTML+=`<span class='del'>${line}</span>\\n`;
-     else diffHTML+=`<span class='info'>${line}</span>\\n`;
-  });
+  diffLines=(c.diff_html||'').split('\\n'); diffLines.pop();   // one <span> per line
   const markBtn=document.getElementById('markbtn');
   const marked=isMarked(c.commit);
   markBtn.textContent=marked?'Unmark 🚫':'Mark for Review ✅';
@@ -128,10 +279,21 @@ async function renderCommit(){
      <span><b>Insertions:</b> ${c.insertions} | <b>Deletions:</b> ${c.deletions}</span>
    </div>
    <h3>${escapeHTML(c.message||'')}</h3>
-   <div class='diff'>${diffHTML}</div>`;
+   <div class='diff'><div style='height:${diffLines.length*LINE_PX}px'></div><div class='rows'></div></div>`;
+  const box=view.querySelector('.diff');
+  box.onscroll=()=>{if(!diffFrame) diffFrame=requestAnimationFrame(()=>{diffFrame=0; renderDiffWindow(box);});};
+  renderDiffWindow(box);
   status.textContent=`Commit ${idx+1}/${commits.length}`;
 }
 
+function renderDiffWindow(box){
+  const start=Math.max(0,Math.floor(box.scrollTop/LINE_PX)-OVERSCAN);
+  const end=Math.min(diffLines.length,start+Math.ceil(box.clientHeight/LINE_PX)+2*OVERSCAN);
+  const rows=box.querySelector('.rows');
+  rows.style.top=`calc(1rem + ${start*LINE_PX}px)`;
+  rows.innerHTML=diffLines.slice(start,end).join('\\n');
+}
+
 function nextCommit(){if(idx<commits.length-1){idx++;renderCommit();}}
 function prevCommit(){if(idx>0){idx--;renderCommit();}}
 function jumpTo(){
@@ -139,12 +301,14 @@ function jumpTo(){
   if(isNaN(n)||!commits.length)return;
   n=Math.max(1,Math.min(n,commits.length)); idx=n-1; renderCommit();
 }
-function escapeHTML(s){return s?s.replace(/[&<>]/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;'}[c])):'';}
-function isMarked(hash){return curated[category]?.some(c=>c.commit===hash);}
+function escapeHTML(s){return s?s.replaceAll('&','&amp;').replaceAll('<','&lt;').replaceAll('>','&gt;'):'';}
+function isMarked(hash){return curatedSets[category]?.has(hash)??false;}
 async function toggleMark(hash){
   const marked=isMarked(hash);
-  await fetch('/mark',{method:'POST',body:JSON.stringify({cat:category,commit:hash,action:marked?'remove':'add'})});
-  curated=await (await fetch('/curated')).json();
+  const res=await (await fetch('/mark',{method:'POST',body:JSON.stringify({cat:category,commit:hash,action:marked?'remove':'add'})})).json();
+  if(res.status!=='ok') return;
+  const set=(curatedSets[res.cat]||=new Set());
+  if(res.marked) set.add(res.commit); else set.delete(res.commit);
   renderCommit();
 }
 document.addEventListener('keydown',e=>{
@@ -181,63 +345,154 @@ def index_html():
 <div id="view"><p style="color:#777">Select a category.</p></div>
 </body></html>"""
 
+INDEX_BYTES = index_html().encode("utf-8", "replace")
+INDEX_GZ = gzip.compress(INDEX_BYTES)
+INDEX_ETAG = '"' + hashlib.md5(INDEX_BYTES).hexdigest() + '"'
+INDEX_GZ_ETAG = INDEX_ETAG[:-1] + '-gz"'   # a different representation, so a different tag
+
 # ---------------------------------------------------------------------
+class FastServer(ThreadingHTTPServer):
+    allow_reuse_address = True   # restart straight away over TIME_WAIT sockets
+    request_queue_size = 64      # listen backlog; 5 resets bursts of parallel fetches
+
 class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: the page's fetches reuse one connection
+
+    def setup(self):
+        super().setup()
+        # small JSON replies must not wait on Nagle for the client's ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    # path → (method, parses query?); / and /curated never look at the query
+    ROUTES = {
+        "/": ("get_index", False),
+        "/switch": ("get_switch", True),
+        "/category": ("get_category", True),
+        "/diff": ("get_diff", True),
+        "/curated": ("get_curated", False),
+    }
+
     def do_GET(self):
-        global CURRENT_SRC
         parsed = urlparse(self.path)
-        qs = parse_qs(parsed.query)
-        if parsed.path == "/":
-            self.respond(200, "text/html", index_html()); return
-        if parsed.path == "/switch":
-            src = qs.get("src", ["raw"])[0]
-            CURRENT_SRC = src
-            cats = list((CURATED_DATA if src=="curated" else RAW_DATA).keys())
-            self.send_json(cats); return
-        if parsed.path == "/category":
-            src = qs.get("src", ["raw"])[0]
-            cat = qs.get("name", [""])[0]
-            data = CURATED_DATA if src=="curated" else RAW_DATA
-            self.send_json(data.get(cat, [])); return
-        if parsed.path == "/diff":
-            src = qs.get("src", ["raw"])[0]
-            cat = qs.get("cat", [""])[0]
-            i = int(qs.get("idx", [0])[0])
-            data = CURATED_DATA if src=="curated" else RAW_DATA
-            arr = data.get(cat, [])
-            self.send_json(arr[i] if 0<=i<len(arr) else {}); return
-        if parsed.path == "/curated":
-            self.send_json(CURATED_DATA); return
-        self.respond(404, "text/plain", "Not Found")
+        route = self.ROUTES.get(parsed.path)
+        if not route: return self.respond(404, "text/plain", "Not Found")
+        name, wants_qs = route
+        getattr(self, name)(parse_qs(parsed.query) if wants_qs else None)
+
+    def get_index(self, qs):
+        gz = self.accepts_gzip()
+        body, etag = (INDEX_GZ, INDEX_GZ_ETAG) if gz else (INDEX_BYTES, INDEX_ETAG)
+        if self.headers.get("If-None-Match") == etag:
+            return self.not_modified(etag)
+        headers = {**self.gzip_headers(gz), "ETag": etag,
+                   "Cache-Control": "public, max-age=3600"}
+        self.respond(200, "text/html", body, headers)
+
+    def get_switch(self, qs):
+        global CURRENT_SRC
+        src = qs.get("src", ["raw"])[0]
+        CURRENT_SRC = src
+        self.send_json(list((CURATED_DATA if src=="curated" else RAW_DATA).keys()))
+
+    def get_category(self, qs):
+        src = qs.get("src", ["raw"])[0]
+        cat = qs.get("name", [""])[0]
+        if "offset" in qs or "limit" in qs:   # paged: encode just the slice
+            arr = (CURATED_DATA if src=="curated" else RAW_DATA).get(cat, [])
+            lo, limit = int_param(qs, "offset", 0), int_param(qs, "limit", len(arr))
+            if lo is None or limit is None or lo > len(arr):
+                return self.bad_request("offset/limit must be non-negative integers within the category")
+            hi = lo + limit
+            return self.send_json([{k: c.get(k) for k in SUMMARY_KEYS} for c in arr[lo:hi]])
+        fmt = "ndjson" if "application/x-ndjson" in self.headers.get("Accept", "") else "json"
+        ctype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        hit = cached(src, cat)
+        if not hit: return self.respond(200, ctype, b"" if fmt == "ndjson" else b"[]")
+        body, gz_body, etag, gz_etag = hit[0][fmt]
+        gz = self.accepts_gzip()
+        if gz: body, etag = gz_body, gz_etag
+        if self.headers.get("If-None-Match") == etag:
+            return self.not_modified(etag)
+        headers = {**self.gzip_headers(gz), "Vary": "Accept, Accept-Encoding",
+                   "ETag": etag, "Cache-Control": "no-cache"}
+        self.respond(200, ctype, body, headers)
+
+    def get_diff(self, qs):
+        src = qs.get("src", ["raw"])[0]
+        cat = qs.get("cat", [""])[0]
+        i = int_param(qs, "idx", 0)
+        entries = (cached(src, cat) or (b"", []))[1]
+        if i is None or i >= len(entries):
+            return self.bad_request("idx must be an integer index into the category")
+        gz = self.accepts_gzip()
+        self.send_blob(*entries[i][gz], self.gzip_headers(gz))
+
+    def get_curated(self, qs):
+        etag = f'"curated-{BOOT_ID}-{CURATED_VERSION}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.not_modified(etag)
+        self.respond(200, "application/json", orjson.dumps(CURATED_DATA),
+                     {"ETag": etag, "Cache-Control": "no-cache"})
 
     def do_POST(self):
-        global CURATED_DATA
+        global CURATED_DATA, CURATED_VERSION
         length = int(self.headers.get("Content-Length", "0"))
-        body = self.rfile.read(length).decode("utf-8", "replace")
-        data = json.loads(body or "{}")
+        data = orjson.loads(self.rfile.read(length) or b"{}")
         cat, commit_hash, action = data.get("cat"), data.get("commit"), data.get("action")
         if not (cat and commit_hash): return self.send_json({"status":"error"})
-        changed=False
-        if action=="add":
-            entry = next((c for c in RAW_DATA.get(cat,[]) if c["commit"]==commit_hash), None)
-            if entry and not any(c["commit"]==commit_hash for c in CURATED_DATA.get(cat,[])):
-                CURATED_DATA[cat].append(entry); changed=True
-        elif action=="remove":
-            CURATED_DATA[cat] = [c for c in CURATED_DATA.get(cat,[]) if c["commit"]!=commit_hash]
-            changed=True
-        if changed:
-            with open(CURATED_FILE,"w",encoding="utf-8") as f:
-                json.dump(CURATED_DATA,f,indent=2,ensure_ascii=False)
-        self.send_json({"status":"ok","action":action})
+        with CURATED_LOCK:
+            changed=False
+            hashes = CURATED_SET.setdefault(cat, set())
+            if action=="add":
+                entry = RAW_INDEX.get(cat, {}).get(commit_hash)
+                if entry and commit_hash not in hashes:
+                    CURATED_DATA.setdefault(cat, []).append(entry)
+                    CURATED_HASHES.setdefault(cat, []).append(commit_hash)
+                    hashes.add(commit_hash); changed=True
+            elif action=="remove" and commit_hash in hashes:
+                i = CURATED_HASHES[cat].index(commit_hash)   # C-level scan of str list
+                del CURATED_HASHES[cat][i], CURATED_DATA[cat][i]
+                hashes.discard(commit_hash); changed=True
+            if changed:
+                CURATED_VERSION += 1
+                CACHE["curated"][cat] = encode_category(CURATED_DATA[cat])
+                CURATED_DIRTY.set()
+            marked = commit_hash in hashes
+        # just the delta; the page patches its copy of /curated from it
+        self.send_json({"status":"ok","cat":cat,"commit":commit_hash,"marked":marked})
 
     # helpers
-    def respond(self,code,ctype,body):
-        self.send_response(code)
-        self.send_header("Content-Type", f"{ctype}; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(body.encode("utf-8","replace") if isinstance(body,str) else body)
+    # Status line and headers are built by hand and go out in the same
+    # write() as the body; send_response() would write (and log) each piece.
+    def log_request(self, code="-", size="-"): pass   # errors still reach log_error
+    def head(self,code,headers):
+        lines = [f"{self.protocol_version} {code} {self.responses[code][0]}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    def respond(self,code,ctype,body,headers=None):
+        if isinstance(body,str): body = body.encode("utf-8","replace")
+        headers = {"Content-Type": f"{ctype}; charset=utf-8",
+                   "Content-Length": len(body), **(headers or {})}
+        self.wfile.write(self.head(code, headers) + body)
+    def not_modified(self,etag):
+        self.wfile.write(self.head(304, {"ETag": etag}))
+    def bad_request(self,msg):
+        self.respond(400,"application/json",orjson.dumps({"status":"error","error":msg}))
     def send_json(self,obj):
-        self.respond(200,"application/json",json.dumps(obj,ensure_ascii=False))
+        self.respond(200,"application/json",orjson.dumps(obj))
+    def accepts_gzip(self):
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+    def gzip_headers(self,gz):
+        headers = {"Vary": "Accept-Encoding"}
+        if gz: headers["Content-Encoding"] = "gzip"
+        return headers
+    def send_blob(self,off,size,headers=None):
+        self.wfile.write(self.head(200, {"Content-Type": "application/json; charset=utf-8",
+                                         "Content-Length": size, **(headers or {})}))
+        out, src = self.connection.fileno(), DIFF_BLOB.fileno()
+        while size > 0:   # explicit offset: shared file position is never moved
+            sent = os.sendfile(out, src, off, size)
+            off += sent; size -= sent
 
 # ---------------------------------------------------------------------
 def main():
@@ -245,7 +500,11 @@ def main():
     url=f"http://127.0.0.1:{port}/"
     print(f"🌐 Serving on {url}")
     webbrowser.open(url)
-    HTTPServer(("127.0.0.1",port),Handler).serve_forever()
+    threading.Thread(target=flush_loop, daemon=True).start()
+    atexit.register(flush_curated)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))   # unwind so atexit runs
+    # one thread per request: a large /diff no longer holds up /curated or /mark
+    FastServer(("127.0.0.1",port),Handler).serve_forever()
 
 if __name__=="__main__":
     main()
\ No newline at end of file